@@ -1,13 +1,21 @@
+from __future__ import annotations
+
+import hmac
 import json
 import logging
 import sys
-from dataclasses import asdict, dataclass
-from typing import Any, Dict, List, Optional, Tuple, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import orjson
 
-import numpy as np
-import pandas as pd
-import yfinance as yf
-from curl_cffi import requests
+if TYPE_CHECKING:
+    # Imported lazily at runtime, see load_dependencies()
+    import pandas as pd
+    import yfinance as yf
+    from curl_cffi import requests
 
 import os
 import tempfile
@@ -18,65 +26,124 @@ logger.setLevel(logging.WARNING)
 
 # --- START: SECURITY CONFIGURATION ---
 SECRET_KEY = os.environ.get("SECRET_KEY")
+SECRET_KEY_BYTES = SECRET_KEY.encode() if SECRET_KEY else None
 # --- END: SECURITY CONFIGURATION ---
 
+# Upper bound on concurrent Yahoo Finance lookups per invocation
+MAX_WORKERS = 16
+
+# Currencies Yahoo quotes in minor units, mapped to their divisor (pence -> pounds)
+MINOR_CURRENCY_DIVISORS = {"GBp": 100}
+
+# info keys converted by get_pricing_information_from_tickers, in unpacking order
+PRICE_FIELDS = (
+    "currentPrice",
+    "targetLowPrice",
+    "targetMeanPrice",
+    "targetMedianPrice",
+    "fiftyTwoWeekLow",
+    "fiftyTwoWeekHigh",
+)
+
 
 # Get the system's temp directory and create our cache folder inside it
 CACHE_DIR = os.path.join(tempfile.gettempdir(), "yfinance_cache")
 if not os.path.exists(CACHE_DIR):
     os.makedirs(CACHE_DIR)
 
-logger.info("Setting cache to: %s", CACHE_DIR)
-yf.set_tz_cache_location(CACHE_DIR)
+# Ticker info kept across warm invocations: ticker -> (fetched_at, info)
+INFO_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+INFO_CACHE_TTL_SECONDS = 300
+INFO_CACHE_MAX_SIZE = 512
+# Ticker workers share the cache, so evict/insert must not interleave
+INFO_CACHE_LOCK = threading.Lock()
 
+# Built once per container; impersonation setup is too costly to repeat per call.
+# curl_cffi keeps a curl handle per thread, so the worker pool can share it.
+SESSION: Optional[requests.Session] = None
 
-@dataclass
-class PricingInfo:
-    """Data class to store stock pricing information."""
 
-    current_price: Optional[float]
-    target_low_price: Optional[float]
-    target_mean_price: Optional[float]
-    target_median_price: Optional[float]
-    fifty_two_week_low: Optional[float]
-    fifty_two_week_high: Optional[float]
-    dividend_yield: Optional[float]
+class PricingInfo:
+    """Store stock pricing information."""
+
+    __slots__ = (
+        "current_price",
+        "target_low_price",
+        "target_mean_price",
+        "target_median_price",
+        "fifty_two_week_low",
+        "fifty_two_week_high",
+        "dividend_yield",
+    )
+
+    def __init__(
+        self,
+        current_price: Optional[float],
+        target_low_price: Optional[float],
+        target_mean_price: Optional[float],
+        target_median_price: Optional[float],
+        fifty_two_week_low: Optional[float],
+        fifty_two_week_high: Optional[float],
+        dividend_yield: Optional[float],
+    ) -> None:
+        self.current_price = current_price
+        self.target_low_price = target_low_price
+        self.target_mean_price = target_mean_price
+        self.target_median_price = target_median_price
+        self.fifty_two_week_low = fifty_two_week_low
+        self.fifty_two_week_high = fifty_two_week_high
+        self.dividend_yield = dividend_yield
 
     def to_dict(self) -> Dict[str, Optional[float]]:
-        """Convert the dataclass to a dictionary."""
-        return asdict(self)
+        """Convert the pricing information to a dictionary."""
+        return {
+            "current_price": self.current_price,
+            "target_low_price": self.target_low_price,
+            "target_mean_price": self.target_mean_price,
+            "target_median_price": self.target_median_price,
+            "fifty_two_week_low": self.fifty_two_week_low,
+            "fifty_two_week_high": self.fifty_two_week_high,
+            "dividend_yield": self.dividend_yield,
+        }
 
 
-class CustomEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle NumPy and pandas data types."""
+def load_dependencies() -> None:
+    """Import pandas, yfinance and curl_cffi on first use.
 
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, (np.integer, np.int64)):
-            return int(obj)
-        if isinstance(obj, (np.floating, np.float64)):
-            if np.isnan(obj):
-                return None
-            return float(obj)
-        if pd.isna(obj):
-            return None
-        return super(CustomEncoder, self).default(obj)
+    These dominate cold-start time, so they are only loaded once a request has
+    passed the API key check. Warm invocations return immediately.
+    """
+    global pd, yf, requests, SESSION
+    if SESSION is not None:
+        return
+
+    import pandas as pd
+    import yfinance as yf
+    from curl_cffi import requests
+
+    logger.info("Setting cache to: %s", CACHE_DIR)
+    yf.set_tz_cache_location(CACHE_DIR)
+
+    SESSION = requests.Session(impersonate="chrome")
 
 
 def get_price_by_currency(
     price: Optional[float], currency: Optional[str]
 ) -> Optional[float]:
     """Convert price to the appropriate currency format."""
-    if price is None:
-        return None
-    if currency == "GBp":
-        return price / 100
-    return price
+    divisor = MINOR_CURRENCY_DIVISORS.get(currency)
+    if price is None or divisor is None:
+        return price
+    return price / divisor
 
 
 def get_dividend_yield(
-    currency: Optional[str], current_price: Optional[float], dividends: pd.DataFrame
+    currency: Optional[str],
+    current_price: Optional[float],
+    dividends: pd.DataFrame,
+    one_year_ago: pd.Timestamp,
 ) -> Optional[float]:
-    """Calculate the annual dividend yield percentage."""
+    """Calculate the annual dividend yield percentage since one_year_ago."""
     if current_price is None or current_price == 0 or dividends.empty:
         return None
 
@@ -85,20 +152,23 @@ def get_dividend_yield(
         return None
 
     try:
-        if dividends.index.tz is None:
-            dividends.index = dividends.index.tz_localize("America/New_York")
-        else:
-            dividends.index = dividends.index.tz_convert("America/New_York")
+        if not dividends.index.is_monotonic_increasing:
+            dividends = dividends.sort_index()
 
-        now = pd.Timestamp.now(tz="America/New_York")
-        one_year_ago = now - pd.DateOffset(years=1)
-        recent_dividends = dividends[dividends.index > one_year_ago]
+        # Work on a local index so yfinance's cached dividends are left untouched
+        index = dividends.index
+        if index.tz is None:
+            index = index.tz_localize("America/New_York")
 
-        if recent_dividends.empty:
+        start = index.searchsorted(one_year_ago, side="right")
+
+        if start == len(index):
             logger.info("No dividends in the last year")
             return 0.0
 
-        annual_dividends = get_price_by_currency(recent_dividends.sum(), currency)
+        annual_dividends = get_price_by_currency(
+            float(dividends.iloc[start:].sum()), currency
+        )
 
         if annual_dividends is None:
             return None
@@ -107,7 +177,7 @@ def get_dividend_yield(
         return dividend_yield
 
     except Exception as e:
-        logger.error(f"Error calculating dividend yield: {str(e)}")
+        logger.error("Error calculating dividend yield: %s", e)
         return None
 
 
@@ -116,31 +186,73 @@ def safe_round(value: Optional[float], decimals: int = 2) -> Optional[float]:
     return round(value, decimals) if value is not None else None
 
 
+def get_cached_info(stock: yf.Ticker, ticker: str) -> Dict[str, Any]:
+    """Return the ticker's info, reusing a recent fetch from a warm container.
+
+    Only responses carrying a current price are cached, so an empty or failed
+    Yahoo lookup is retried on the next request instead of sticking for the TTL.
+    """
+    now = time.monotonic()
+    with INFO_CACHE_LOCK:
+        cached = INFO_CACHE.get(ticker)
+    if cached and now - cached[0] < INFO_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    info = stock.info
+    if info.get("currentPrice") is None:
+        return info
+
+    with INFO_CACHE_LOCK:
+        # Re-insert so the dict stays ordered from oldest to newest fetch
+        INFO_CACHE.pop(ticker, None)
+        if len(INFO_CACHE) >= INFO_CACHE_MAX_SIZE:
+            INFO_CACHE.pop(next(iter(INFO_CACHE)))
+        INFO_CACHE[ticker] = (now, info)
+    return info
+
+
 def get_pricing_information_from_tickers(
-    stock: yf.Ticker, ticker: str
+    stock: yf.Ticker, ticker: str, one_year_ago: pd.Timestamp
 ) -> Optional[PricingInfo]:
     """Extract pricing information from a yfinance Ticker object."""
     try:
-        info = stock.info
+        info = get_cached_info(stock, ticker)
         if info.get("currentPrice") is None:
             raise ValueError(f"No valid data found for ticker '{ticker}'.")
 
+        # Resolve the currency divisor once instead of once per price field
         currency = info.get("currency")
-        current_price = get_price_by_currency(info.get("currentPrice"), currency)
-        fifty_two_week_low = get_price_by_currency(
-            info.get("fiftyTwoWeekLow"), currency
-        )
-        fifty_two_week_high = get_price_by_currency(
-            info.get("fiftyTwoWeekHigh"), currency
-        )
-        target_low_price = get_price_by_currency(info.get("targetLowPrice"), currency)
-        target_mean_price = get_price_by_currency(info.get("targetMeanPrice"), currency)
-        target_median_price = get_price_by_currency(
-            info.get("targetMedianPrice"), currency
-        )
-
-        dividends = stock.dividends
-        dividend_yield = get_dividend_yield(currency, current_price, dividends)
+        divisor = MINOR_CURRENCY_DIVISORS.get(currency)
+        prices = [info.get(field) for field in PRICE_FIELDS]
+        if divisor is not None:
+            prices = [p / divisor if p is not None else None for p in prices]
+        (
+            current_price,
+            target_low_price,
+            target_mean_price,
+            target_median_price,
+            fifty_two_week_low,
+            fifty_two_week_high,
+        ) = prices
+
+        # Yahoo's trailing 12-month dividend total approximates the dividend
+        # history sum (its window isn't exactly one_year_ago) without fetching it.
+        # Fall back to the history for non-payers (keeps null), for minor-unit
+        # currencies, and when the rate may be in the issuer's reporting currency
+        # rather than the quote currency (ADRs, cross-listings).
+        trailing_rate = info.get("trailingAnnualDividendRate")
+        if (
+            trailing_rate
+            and current_price
+            and currency not in MINOR_CURRENCY_DIVISORS
+            and info.get("financialCurrency") in (None, currency)
+        ):
+            dividend_yield = (trailing_rate / current_price) * 100
+        else:
+            dividends = stock.dividends
+            dividend_yield = get_dividend_yield(
+                currency, current_price, dividends, one_year_ago
+            )
 
         return PricingInfo(
             safe_round(current_price),
@@ -153,19 +265,29 @@ def get_pricing_information_from_tickers(
         )
 
     except Exception as e:
-        logger.error(f"Error getting pricing information for {ticker}: {str(e)}")
+        logger.error("Error getting pricing information for %s: %s", ticker, e)
         raise
 
 
+def process_ticker(
+    ticker_symbol: str, one_year_ago: pd.Timestamp
+) -> Optional[PricingInfo]:
+    """Fetch pricing information for a single ticker symbol."""
+    logger.info("Processing %s...", ticker_symbol)
+    stock = yf.Ticker(ticker_symbol, session=SESSION)
+    return get_pricing_information_from_tickers(stock, ticker_symbol, one_year_ago)
+
+
 def check_python_version() -> bool:
     """Check if the current Python version is 3.9."""
     version_info = sys.version_info
     if version_info.major != 3 or version_info.minor != 9:
         logger.warning(
-            f"This Lambda function is designed for Python 3.9. Current version: {sys.version}"
+            "This Lambda function is designed for Python 3.9. Current version: %s",
+            sys.version,
         )
         return False
-    logger.info(f"Python version check passed: {sys.version}")
+    logger.info("Python version check passed: %s", sys.version)
     return True
 
 
@@ -192,7 +314,7 @@ def parse_event(event: Dict[str, Any]) -> Tuple[List[str], bool]:
         return valid_tickers, True
 
     except Exception as e:
-        logger.error(f"Error parsing event: {str(e)}")
+        logger.error("Error parsing event: %s", e)
         raise ValueError(f"Invalid request format: {str(e)}")
 
 
@@ -221,7 +343,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Note: API Gateway may convert header names to lowercase.
     client_secret = headers.get("x-api-key") 
 
-    if client_secret != SECRET_KEY:
+    # Constant-time comparison so response timing doesn't leak the key
+    if not isinstance(client_secret, str) or not hmac.compare_digest(
+        client_secret.encode(), SECRET_KEY_BYTES
+    ):
         logger.warning("Forbidden: Invalid or missing API key.")
         return create_error_response(403, "Forbidden")
     # --- END OF SECURITY CHECK ---
@@ -239,30 +364,38 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     results = {}
     errors = {}
     try:
-        session = requests.Session(impersonate="chrome")
-        logger.info(f"Fetching data for tickers: {', '.join(tickers)}")
-        tickers_obj = yf.Tickers(tickers, session=session)
-
-        for ticker_symbol in tickers:
-            try:
-                logger.info(f"Processing {ticker_symbol}...")
-                stock = tickers_obj.tickers.get(ticker_symbol)
-                if not stock:
-                    raise ValueError(f"Ticker {ticker_symbol} not found in yf.Tickers.")
-
-                pricing_info = get_pricing_information_from_tickers(
-                    stock, ticker_symbol
+        load_dependencies()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Fetching data for tickers: %s", ", ".join(tickers))
+        # Shared dividend window for every ticker in this request
+        now = pd.Timestamp.now(tz="America/New_York")
+        one_year_ago = now - pd.DateOffset(years=1)
+
+        # Each ticker blocks on its own HTTPS calls, so fetch them concurrently
+        unique_tickers = list(dict.fromkeys(tickers))
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_WORKERS, len(unique_tickers))
+        ) as executor:
+            futures = {
+                ticker_symbol: executor.submit(
+                    process_ticker, ticker_symbol, one_year_ago
                 )
-                if pricing_info:
-                    results[ticker_symbol] = pricing_info.to_dict()
-                    logger.info(f"Successfully processed data for {ticker_symbol}")
-            except Exception as e:
-                error_message = f"Error processing {ticker_symbol}: {str(e)}"
-                logger.error(error_message)
-                errors[ticker_symbol] = error_message
+                for ticker_symbol in unique_tickers
+            }
+
+            for ticker_symbol, future in futures.items():
+                try:
+                    pricing_info = future.result()
+                    if pricing_info:
+                        results[ticker_symbol] = pricing_info.to_dict()
+                        logger.info("Successfully processed data for %s", ticker_symbol)
+                except Exception as e:
+                    error_message = f"Error processing {ticker_symbol}: {str(e)}"
+                    logger.error(error_message)
+                    errors[ticker_symbol] = error_message
 
     except Exception as outer_exception:
-        logger.error(f"Unexpected failure: {str(outer_exception)}")
+        logger.error("Unexpected failure: %s", outer_exception)
         return create_error_response(500, f"Unexpected failure: {str(outer_exception)}")
 
     response_body = {"data": results, "errors": errors}
@@ -272,5 +405,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             "Content-Type": "application/json",
             "Access-Control-Allow-Origin": "*",
         },
-        "body": json.dumps(response_body, indent=4, cls=CustomEncoder),
+        "body": orjson.dumps(
+            response_body,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+        ).decode(),
     }
\ No newline at end of file
@@ -1,6 +1,9 @@
 # run_local.py
-import json
+import argparse
 import os
+import sys
+import time
+import orjson
 from dotenv import load_dotenv
 from lambda_function import lambda_handler
 
@@ -13,30 +16,85 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 # 1. Define a mock 'event' object.
 mock_event = {
     "headers": {"x-api-key": SECRET_KEY},
-    "body": json.dumps({"tickers": ["OXY", "XPTO"]}),
+    "body": orjson.dumps({"tickers": ["OXY", "XPTO"]}).decode(),
 }
 
 # 2. Define a mock 'context' object (it's not used, but required).
 mock_context = {}
 
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
 # 3. Call your handler function directly.
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Lambda handler locally.")
+    parser.add_argument(
+        "--batch",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="invoke the handler N times in one process and report the timing",
+    )
+    parser.add_argument(
+        "--pretty",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="indent compact error bodies (default: only when stdout is a terminal)",
+    )
+    args = parser.parse_args()
+    pretty = sys.stdout.isatty() if args.pretty is None else args.pretty
+
     print("--- Running local test ---")
 
     if not SECRET_KEY:
         print("\nERROR: MY_APP_SECRET_KEY not found in .env file.")
         print("Please make sure your .env file is set up correctly.")
     else:
-        # Call the handler from your other file
+        # Call the handler from your other file. The first call is the cold path
+        # (lazy imports, empty info cache); with --batch, the remaining calls in
+        # this process measure the warm path
+        start = time.perf_counter()
         response = lambda_handler(mock_event, mock_context)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(args.batch - 1):
+            response = lambda_handler(mock_event, mock_context)
+        warm = time.perf_counter() - start
+
+        if args.batch > 1:
+            print(f"\n--- Batch: {args.batch} invocations ---")
+            print(f"First (cold) call: {cold:.3f}s")
+            print(
+                f"Warm calls: {args.batch - 1}, "
+                f"average: {warm / (args.batch - 1):.3f}s"
+            )
 
         # 4. Pretty-print the response to see the results clearly.
         print("\n--- Lambda Response ---")
         print(f"Status Code: {response.get('statusCode')}")
 
         if response and response.get("body"):
-            # The body is a JSON string, so we parse it to print it nicely
-            response_body = json.loads(response["body"])
-            print(json.dumps(response_body, indent=4))
+            # Write the bytes straight out instead of decoding them for print();
+            # flush the text layer first so earlier lines stay in order
+            sys.stdout.flush()
+            if pretty and response.get("statusCode") != 200:
+                # Error bodies are compact JSON strings, so parse them to indent
+                response_body = orjson.loads(response["body"])
+                sys.stdout.buffer.write(
+                    orjson.dumps(response_body, option=orjson.OPT_INDENT_2)
+                )
+            else:
+                # Successful bodies are already indented by the handler, and piped
+                # output doesn't need indenting: pass the body through as-is
+                sys.stdout.buffer.write(response["body"].encode())
+            sys.stdout.buffer.write(b"\n")
+            sys.stdout.buffer.flush()
         else:
             print("No response body found.")